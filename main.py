@@ -7,16 +7,25 @@ Automates bid adjustments based on performance metrics.
 import click
 import sys
 from pathlib import Path
-from colorama import init, Fore, Style
 
-# Add src to path
-sys.path.append('src')
+# bid_analyzer (pandas) and rule_engine are imported inside the commands that
+# use them, so `rules` and `quick-start` start without loading pandas
 
-from bid_analyzer import BidAnalyzer
-from rule_engine import RuleEngine, Rule, BidAction
+if sys.stdout.isatty():
+    from colorama import init, Fore, Style
+    
+    # Initialize colorama for Windows color support
+    init()
+else:
+    class _NoColor:
+        """Stand-in for colorama's Fore/Style when output is not a terminal."""
+        def __getattr__(self, name):
+            return ''
+    
+    Fore = Style = _NoColor()
 
-# Initialize colorama for Windows color support
-init()
+# Color codes looked up once instead of on every message
+_GREEN, _RED, _YELLOW, _RESET = Fore.GREEN, Fore.RED, Fore.YELLOW, Style.RESET_ALL
 
 def print_header():
     """Print application header."""
@@ -29,15 +38,15 @@ def print_header():
 
 def print_success(message):
     """Print success message in green."""
-    print(Fore.GREEN + f"✓ {message}" + Style.RESET_ALL)
+    sys.stdout.write(f"{_GREEN}✓ {message}{_RESET}\n")
 
 def print_error(message):
     """Print error message in red."""
-    print(Fore.RED + f"✗ {message}" + Style.RESET_ALL)
+    sys.stdout.write(f"{_RED}✗ {message}{_RESET}\n")
 
 def print_info(message):
     """Print info message in yellow."""
-    print(Fore.YELLOW + f"ℹ {message}" + Style.RESET_ALL)
+    sys.stdout.write(f"{_YELLOW}ℹ {message}{_RESET}\n")
 
 @click.group()
 def cli():
@@ -49,13 +58,17 @@ def cli():
 @click.option('--sample', is_flag=True, help='Use sample data for testing')
 @click.option('--export', '-e', type=click.Path(), help='Export path for recommendations')
 @click.option('--verbose', '-v', is_flag=True, help='Show detailed output')
-def analyze(file, sample, export, verbose):
+@click.option('--engine', type=click.Choice(['numpy', 'polars']), default='numpy',
+              help='Rule evaluation engine (polars must be installed)')
+def analyze(file, sample, export, verbose, engine):
     """Analyze ad performance and generate bid recommendations."""
     print_header()
     
     try:
+        from src.bid_analyzer import BidAnalyzer
+        
         # Initialize analyzer
-        analyzer = BidAnalyzer()
+        analyzer = BidAnalyzer(engine=engine)
         
         # Load data
         if sample:
@@ -87,16 +100,16 @@ def analyze(file, sample, export, verbose):
         
         # Show detailed recommendations if verbose
         if verbose:
-            print("\n" + "="*60)
-            print("DETAILED RECOMMENDATIONS")
-            print("="*60)
+            lines = ["\n" + "="*60, "DETAILED RECOMMENDATIONS", "="*60]
             for rec in recommendations:
-                print(f"\n📍 {rec.sku} ({rec.campaign_id})")
-                print(f"   Current Bid: ${rec.current_bid:.2f}")
-                print(f"   Recommended: ${rec.recommended_bid:.2f}")
-                print(f"   Action: {rec.action.value.upper()}")
-                print(f"   ACOS: {rec.metrics.get('acos', 0):.1f}%")
-                print(f"   Reason: {rec.reason}")
+                lines.append(f"\n📍 {rec.sku} ({rec.campaign_id})")
+                lines.append(f"   Current Bid: ${rec.current_bid:.2f}")
+                lines.append(f"   Recommended: ${rec.recommended_bid:.2f}")
+                lines.append(f"   Action: {rec.action.value.upper()}")
+                lines.append(f"   ACOS: {rec.metrics.acos:.1f}%")
+                lines.append(f"   Reason: {rec.reason}")
+            # One write for the whole block instead of a print per line
+            sys.stdout.write("\n".join(lines) + "\n")
         
         # Export if requested
         if export:
@@ -118,6 +131,8 @@ def rules():
     print("\n📋 ACTIVE BIDDING RULES")
     print("="*60)
     
+    from src.rule_engine import RuleEngine
+    
     engine = RuleEngine()
     rules = engine.get_rules_summary()
     
@@ -8,30 +8,61 @@ import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import json
+import csv
+import codecs
+import os
+import sys
+from collections import Counter
 from datetime import datetime
 
-from rule_engine import RuleEngine, BidRecommendation, BidAction
+from .rule_engine import RuleEngine, BidRecommendation, BidAction
+
+try:
+    import orjson  # Optional: faster JSON parsing
+except ImportError:
+    orjson = None
+
+# Enum values looked up once instead of through BidAction.value per recommendation
+_ACTION_NAMES = {action: action.value for action in BidAction}
+
+_ACTION_EMOJIS = {
+    'increase': '⬆️',
+    'decrease': '⬇️',
+    'pause': '⏸️'
+}
+
+# Column order of the recommendations CSV export
+EXPORT_COLUMNS = [
+    'Campaign ID', 'SKU', 'Current Bid', 'Recommended Bid', 'Action', 'Bid Change',
+    'Reason', 'ACOS', 'Ad Spend', 'Revenue', 'Sales'
+]
 
 class BidAnalyzer:
     """Analyzes eBay ad performance and generates bid recommendations."""
     
-    def __init__(self, rule_engine: Optional[RuleEngine] = None):
-        """Initialize the analyzer with a rule engine."""
+    def __init__(self, rule_engine: Optional[RuleEngine] = None, engine: str = 'numpy'):
+        """
+        Initialize the analyzer with a rule engine.
+        engine selects how rules are evaluated: 'numpy' (default) or 'polars'.
+        """
+        if engine not in ('numpy', 'polars'):
+            raise ValueError(f"Unknown engine '{engine}'. Use 'numpy' or 'polars'.")
         self.rule_engine = rule_engine or RuleEngine()
+        self.engine = engine
         self.data = None
         self.recommendations = []
         
     def load_csv(self, filepath: str) -> pd.DataFrame:
         """Load eBay ad report from CSV file."""
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            for encoding in encodings:
-                try:
+            encoding = self._detect_encoding(filepath)
+            try:
+                self.data = self._read_csv_arrow(filepath, encoding)
+                if self.data is None:
                     self.data = pd.read_csv(filepath, encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
+            except UnicodeDecodeError:
+                # Invalid UTF-8 past the sniffed prefix
+                self.data = pd.read_csv(filepath, encoding='latin-1')
             
             self._standardize_columns()
             print(f"✓ Loaded {len(self.data)} campaigns from CSV")
@@ -40,19 +71,57 @@ class BidAnalyzer:
         except Exception as e:
             raise Exception(f"Error loading CSV: {e}")
     
+    @staticmethod
+    def _detect_encoding(filepath: str) -> str:
+        """Guess the file encoding from its first 64 KiB: UTF-8 if it decodes, else Latin-1."""
+        with open(filepath, 'rb') as f:
+            head = f.read(64 * 1024)
+        try:
+            # Incremental decode so a multi-byte character cut at the boundary is not an error
+            codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    @staticmethod
+    def _read_csv_arrow(filepath: str, encoding: str) -> Optional[pd.DataFrame]:
+        """Read a CSV with pyarrow's multi-threaded parser, or return None if unavailable."""
+        try:
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            return None
+        try:
+            table = pa_csv.read_csv(
+                filepath,
+                read_options=pa_csv.ReadOptions(encoding=encoding),
+                # Empty cells become NaN, as with pd.read_csv
+                convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+            )
+        except Exception:
+            # Let pandas handle anything Arrow's stricter parser rejects
+            return None
+        return table.to_pandas()
+    
     def load_json(self, filepath: str) -> pd.DataFrame:
         """Load eBay ad report from JSON file."""
         try:
-            with open(filepath, 'r') as f:
-                json_data = json.load(f)
+            raw = Path(filepath).read_bytes()
+            if orjson is not None:
+                try:
+                    json_data = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    # orjson is strict about NaN/Infinity; the stdlib parser accepts them
+                    json_data = json.loads(raw)
+            else:
+                json_data = json.loads(raw)
             
             # Handle both array and object formats
+            if isinstance(json_data, dict):
+                json_data = json_data['data'] if 'data' in json_data else [json_data]
             if isinstance(json_data, list):
-                self.data = pd.DataFrame(json_data)
-            elif isinstance(json_data, dict) and 'data' in json_data:
-                self.data = pd.DataFrame(json_data['data'])
+                self.data = pd.DataFrame.from_records(json_data)
             else:
-                self.data = pd.DataFrame([json_data])
+                self.data = pd.DataFrame(json_data)
             
             self._standardize_columns()
             print(f"✓ Loaded {len(self.data)} campaigns from JSON")
@@ -63,33 +132,44 @@ class BidAnalyzer:
     
     def load_sample_data(self) -> pd.DataFrame:
         """Generate sample data for testing."""
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
+        n = 20
         
-        sample_data = {
-            'campaign_id': [f'CAM_{i:03d}' for i in range(1, 21)],
-            'sku': [f'SKU_{i:04d}' for i in range(1001, 1021)],
-            'product_name': [f'Product {i}' for i in range(1, 21)],
-            'current_bid': np.random.uniform(0.5, 5.0, 20).round(2),
-            'impressions': np.random.randint(100, 10000, 20),
-            'clicks': np.random.randint(0, 500, 20),
-            'ad_spend': np.random.uniform(0, 100, 20).round(2),
-            'sales': np.random.randint(0, 20, 20),
-            'revenue': np.random.uniform(0, 500, 20).round(2)
-        }
+        # One contiguous record block for all numeric fields; money stays
+        # float64 so values are exact to the cent
+        sample = np.empty(n, dtype=[
+            ('current_bid', 'f8'),
+            ('impressions', 'i4'),
+            ('clicks', 'i4'),
+            ('ad_spend', 'f8'),
+            ('sales', 'i4'),
+            ('revenue', 'f8')
+        ])
+        sample['current_bid'] = np.rint(rng.uniform(0.5, 5.0, n) * 100) / 100
+        sample['impressions'] = rng.integers(100, 10000, n)
+        sample['clicks'] = rng.integers(0, 500, n)
+        sample['ad_spend'] = np.rint(rng.uniform(0, 100, n) * 100) / 100
+        sample['sales'] = rng.integers(0, 20, n)
+        sample['revenue'] = np.rint(rng.uniform(0, 500, n) * 100) / 100
         
         # Ensure some specific scenarios
-        sample_data['sales'][5] = 0  # No sales scenario
-        sample_data['ad_spend'][5] = 15.00  # High spend, no sales
+        sample['sales'][5] = 0  # No sales scenario
+        sample['ad_spend'][5] = 15.00  # High spend, no sales
         
-        sample_data['sales'][10] = 10  # High performance
-        sample_data['revenue'][10] = 300
-        sample_data['ad_spend'][10] = 30  # ACOS = 10%
+        sample['sales'][10] = 10  # High performance
+        sample['revenue'][10] = 300
+        sample['ad_spend'][10] = 30  # ACOS = 10%
         
-        sample_data['sales'][15] = 2  # Poor performance
-        sample_data['revenue'][15] = 50
-        sample_data['ad_spend'][15] = 25  # ACOS = 50%
+        sample['sales'][15] = 2  # Poor performance
+        sample['revenue'][15] = 50
+        sample['ad_spend'][15] = 25  # ACOS = 50%
         
-        self.data = pd.DataFrame(sample_data)
+        # Identifiers built with NumPy string ufuncs rather than per-item f-strings
+        numbers = np.arange(1, n + 1).astype(str)
+        self.data = pd.DataFrame.from_records(sample)
+        self.data.insert(0, 'campaign_id', np.char.add('CAM_', np.char.zfill(numbers, 3)))
+        self.data.insert(1, 'sku', np.char.add('SKU_', np.char.zfill(np.arange(1001, 1001 + n).astype(str), 4)))
+        self.data.insert(2, 'product_name', np.char.add('Product ', numbers))
         print(f"✓ Generated {len(self.data)} sample campaigns")
         return self.data
     
@@ -133,21 +213,25 @@ class BidAnalyzer:
         
         # Ensure numeric columns are numeric
         numeric_columns = ['current_bid', 'ad_spend', 'sales', 'revenue', 'clicks', 'impressions']
-        for col in numeric_columns:
-            if col in self.data.columns:
-                self.data[col] = pd.to_numeric(self.data[col], errors='coerce').fillna(0)
+        present = [col for col in numeric_columns if col in self.data.columns]
+        if present:
+            # Convert all numeric columns in one block instead of column by column
+            self.data[present] = self.data[present].apply(pd.to_numeric, errors='coerce').fillna(0)
     
     def analyze(self) -> List[BidRecommendation]:
         """Analyze all campaigns and generate recommendations."""
         if self.data is None:
             raise ValueError("No data loaded. Please load data first.")
         
-        self.recommendations = []
+        if self.engine == 'polars':
+            recommendations = self.rule_engine.evaluate_frame_polars(self.data)
+        else:
+            recommendations = self.rule_engine.evaluate_frame(self.data)
         
-        for _, row in self.data.iterrows():
-            recommendation = self.rule_engine.evaluate_row(row)
-            if recommendation and recommendation.action != BidAction.NO_CHANGE:
-                self.recommendations.append(recommendation)
+        self.recommendations = [
+            rec for rec in recommendations
+            if rec.action != BidAction.NO_CHANGE
+        ]
         
         print(f"✓ Generated {len(self.recommendations)} recommendations")
         return self.recommendations
@@ -157,15 +241,12 @@ class BidAnalyzer:
         if not self.recommendations:
             return {"message": "No recommendations generated yet"}
         
-        action_counts = {}
-        total_current_spend = 0
-        total_recommended_spend = 0
-        
-        for rec in self.recommendations:
-            action = rec.action.value
-            action_counts[action] = action_counts.get(action, 0) + 1
-            total_current_spend += rec.current_bid
-            total_recommended_spend += rec.recommended_bid
+        action_counts = {
+            _ACTION_NAMES[action]: count
+            for action, count in Counter(rec.action for rec in self.recommendations).items()
+        }
+        total_current_spend = sum(rec.current_bid for rec in self.recommendations)
+        total_recommended_spend = sum(rec.recommended_bid for rec in self.recommendations)
         
         return {
             'total_recommendations': len(self.recommendations),
@@ -181,25 +262,6 @@ class BidAnalyzer:
         if not self.recommendations:
             raise ValueError("No recommendations to export")
         
-        # Create DataFrame from recommendations
-        export_data = []
-        for rec in self.recommendations:
-            export_data.append({
-                'Campaign ID': rec.campaign_id,
-                'SKU': rec.sku,
-                'Current Bid': rec.current_bid,
-                'Recommended Bid': rec.recommended_bid,
-                'Action': rec.action.value.upper(),
-                'Bid Change': round(rec.recommended_bid - rec.current_bid, 2),
-                'Reason': rec.reason,
-                'ACOS': round(rec.metrics.get('acos', 0), 2),
-                'Ad Spend': round(rec.metrics.get('ad_spend', 0), 2),
-                'Revenue': round(rec.metrics.get('revenue', 0), 2),
-                'Sales': rec.metrics.get('sales', 0)
-            })
-        
-        df = pd.DataFrame(export_data)
-        
         # Generate filename if not provided
         if output_path is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -208,8 +270,26 @@ class BidAnalyzer:
         # Ensure directory exists
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        # Export to CSV
-        df.to_csv(output_path, index=False)
+        # Stream rows straight to disk; the schema is fixed so no DataFrame is needed
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(
+                (
+                    rec.campaign_id,
+                    rec.sku,
+                    rec.current_bid,
+                    rec.recommended_bid,
+                    _ACTION_NAMES[rec.action].upper(),
+                    round(rec.recommended_bid - rec.current_bid, 2),
+                    rec.reason,
+                    round(rec.metrics.acos, 2),
+                    round(rec.metrics.ad_spend, 2),
+                    round(rec.metrics.revenue, 2),
+                    rec.metrics.sales
+                )
+                for rec in self.recommendations
+            )
         print(f"✓ Exported recommendations to {output_path}")
         
         return output_path
@@ -224,40 +304,35 @@ class BidAnalyzer:
             print("No recommendations generated yet.")
             return
         
-        print("\n" + "="*60)
-        print("📊 BID ADJUSTMENT SUMMARY REPORT")
-        print("="*60)
-        
         stats = self.get_summary_statistics()
         
-        print(f"\n📈 Total Recommendations: {stats['total_recommendations']}")
-        print(f"💰 Current Total Bids: ${stats['current_total_bid']:.2f}")
-        print(f"💡 Recommended Total Bids: ${stats['recommended_total_bid']:.2f}")
-        print(f"📊 Net Change: ${stats['net_change']:.2f} ({stats['percent_change']:+.1f}%)")
-        
-        print("\n🎯 Actions Breakdown:")
+        # Collect the report and write it once rather than printing line by line
+        lines = [
+            "\n" + "="*60,
+            "📊 BID ADJUSTMENT SUMMARY REPORT",
+            "="*60,
+            f"\n📈 Total Recommendations: {stats['total_recommendations']}",
+            f"💰 Current Total Bids: ${stats['current_total_bid']:.2f}",
+            f"💡 Recommended Total Bids: ${stats['recommended_total_bid']:.2f}",
+            f"📊 Net Change: ${stats['net_change']:.2f} ({stats['percent_change']:+.1f}%)",
+            "\n🎯 Actions Breakdown:"
+        ]
         for action, count in stats['actions'].items():
-            emoji = {
-                'increase': '⬆️',
-                'decrease': '⬇️',
-                'pause': '⏸️'
-            }.get(action, '•')
-            print(f"  {emoji} {action.capitalize()}: {count} campaigns")
+            emoji = _ACTION_EMOJIS.get(action, '•')
+            lines.append(f"  {emoji} {action.capitalize()}: {count} campaigns")
         
         # Show top recommendations
-        print("\n🔝 Top 5 Recommendations:")
-        print("-" * 60)
+        lines.append("\n🔝 Top 5 Recommendations:")
+        lines.append("-" * 60)
         
         for i, rec in enumerate(self.recommendations[:5], 1):
-            action_symbol = {
-                BidAction.INCREASE: '⬆️',
-                BidAction.DECREASE: '⬇️',
-                BidAction.PAUSE: '⏸️'
-            }.get(rec.action, '•')
+            action_name = _ACTION_NAMES[rec.action]
+            action_symbol = _ACTION_EMOJIS.get(action_name, '•')
             
-            print(f"\n{i}. {rec.sku} ({rec.campaign_id})")
-            print(f"   {action_symbol} Action: {rec.action.value.upper()}")
-            print(f"   💵 Bid: ${rec.current_bid:.2f} → ${rec.recommended_bid:.2f}")
-            print(f"   📝 Reason: {rec.reason}")
+            lines.append(f"\n{i}. {rec.sku} ({rec.campaign_id})")
+            lines.append(f"   {action_symbol} Action: {action_name.upper()}")
+            lines.append(f"   💵 Bid: ${rec.current_bid:.2f} → ${rec.recommended_bid:.2f}")
+            lines.append(f"   📝 Reason: {rec.reason}")
         
-        print("\n" + "="*60)
\ No newline at end of file
+        lines.append("\n" + "="*60)
+        sys.stdout.write("\n".join(lines) + "\n")
@@ -0,0 +1,174 @@
+# src/conditions.py
+"""
+Lowering of rule condition strings to whole-column predicates.
+Conditions are parsed with ast and turned into callables over NumPy arrays
+or Polars expressions, with checks for rows where vectorized evaluation
+would disagree with Python's eval.
+"""
+
+from typing import Dict, List, Any, Callable, Mapping
+import ast
+import operator
+import numpy as np
+
+# Element-wise counterparts of the functions allowed in conditions
+ARRAY_FUNCTIONS = {
+    'min': np.minimum,
+    'max': np.maximum,
+    'abs': np.abs
+}
+
+# No Pow: NumPy wraps int64 and returns inf where Python computes exact
+# integers or raises OverflowError, so such conditions run row by row
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod
+}
+
+COMPARE_OPERATORS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne
+}
+
+def polars_functions() -> Dict[str, Callable]:
+    """Polars expression counterparts of the functions allowed in conditions."""
+    import polars as pl
+    return {
+        'min': pl.min_horizontal,
+        'max': pl.max_horizontal,
+        'abs': lambda expr: expr.abs()
+    }
+
+def as_mask(value: Any) -> Any:
+    """Apply Python truthiness to numeric arrays so they can be combined with & and |."""
+    if isinstance(value, np.ndarray):
+        return value if value.dtype == bool else value != 0
+    if isinstance(value, (int, float)):
+        return np.bool_(value)
+    return value
+
+def polars_mask(value: Any) -> Any:
+    """Polars counterpart of as_mask: casting to Boolean applies Python truthiness."""
+    import polars as pl
+    if isinstance(value, pl.Expr):
+        return value.cast(pl.Boolean)
+    return as_mask(value)
+
+def compile_predicate(condition: str, functions: Mapping[str, Callable] = ARRAY_FUNCTIONS,
+                       to_mask: Callable[[Any], Any] = as_mask) -> Callable[[Mapping[str, Any]], Any]:
+    """
+    Lower a condition string into a callable over whole metric columns.
+    `and`/`or`/`not` become element-wise `&`/`|`/`~`, so the callable works on
+    NumPy arrays and returns a boolean mask. Raises ValueError for syntax
+    that cannot be evaluated column-wise.
+    """
+    def lower(node):
+        if isinstance(node, ast.Expression):
+            return lower(node.body)
+        if isinstance(node, ast.BoolOp):
+            combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+            parts = [lower(value) for value in node.values]
+            def bool_op(m):
+                result = to_mask(parts[0](m))
+                for part in parts[1:]:
+                    result = combine(result, to_mask(part(m)))
+                return result
+            return bool_op
+        if isinstance(node, ast.UnaryOp):
+            operand = lower(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda m: ~to_mask(operand(m))
+            if isinstance(node.op, ast.USub):
+                return lambda m: -operand(m)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left, right = lower(node.left), lower(node.right)
+            return lambda m: op(left(m), right(m))
+        if isinstance(node, ast.Compare) and all(type(op) in COMPARE_OPERATORS for op in node.ops):
+            # a < b < c is (a < b) & (b < c)
+            operands = [lower(node.left)] + [lower(c) for c in node.comparators]
+            ops = [COMPARE_OPERATORS[type(op)] for op in node.ops]
+            def compare(m):
+                values = [operand(m) for operand in operands]
+                result = ops[0](values[0], values[1])
+                for i in range(1, len(ops)):
+                    result = result & ops[i](values[i], values[i + 1])
+                return result
+            return compare
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+                and node.func.id in functions and not node.keywords:
+            func = functions[node.func.id]
+            args = [lower(arg) for arg in node.args]
+            if len(args) == 1:
+                return lambda m: func(args[0](m))
+            def call(m):
+                result = args[0](m)
+                for arg in args[1:]:
+                    result = func(result, arg(m))
+                return result
+            return call
+        if isinstance(node, ast.Name):
+            name = node.id
+            return lambda m: m[name]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, bool)):
+            value = node.value
+            return lambda m: value
+        raise ValueError(f"Unsupported expression in condition '{condition}': {ast.dump(node)}")
+    
+    try:
+        tree = ast.parse(condition.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid condition '{condition}': {e}")
+    return lower(tree)
+
+def unsafe_row_checks(condition: str) -> List[Callable[[Mapping[str, Any]], Any]]:
+    """
+    Callables over metric columns flagging rows where the NumPy predicate and
+    Python's eval disagree: a zero divisor, where Python raises and NumPy
+    yields inf/nan (also for an inf dividend, which sets no floating-point
+    flag), and min/max over NaN, which Python resolves by argument order.
+    """
+    checks = []
+    for node in ast.walk(ast.parse(condition.strip(), mode='eval')):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)):
+            divisor = compile_predicate(ast.unparse(node.right))
+            checks.append(lambda m, divisor=divisor: divisor(m) == 0)
+        elif isinstance(node, ast.Call):
+            args = [compile_predicate(ast.unparse(arg)) for arg in node.args]
+            checks.append(lambda m, args=args: np.logical_or.reduce(
+                [np.isnan(np.asarray(arg(m), dtype=float)) for arg in args]
+            ))
+    return checks
+
+def polars_unsafe_rows(condition: str, columns: Mapping[str, Any], functions: Mapping[str, Callable]) -> Any:
+    """
+    Polars expression flagging rows where evaluating the condition in Python
+    could raise or meet NaN: a zero divisor, or a NaN operand or intermediate
+    result. Conditions using // or % flag every row.
+    """
+    import polars as pl
+    
+    def value(node):
+        result = compile_predicate(ast.unparse(node), functions, polars_mask)(columns)
+        return result if isinstance(result, pl.Expr) else pl.lit(result)
+    
+    flags = pl.lit(False)
+    for node in ast.walk(ast.parse(condition.strip(), mode='eval')):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.FloorDiv, ast.Mod)):
+            # Polars floors the true quotient of floats (7.0 // 0.1 is 70, not 69)
+            flags = pl.lit(True)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+            flags = flags | (value(node.right) == 0)
+        if isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call, ast.Name)):
+            flags = flags | value(node).cast(pl.Float64).is_nan()
+    return flags
@@ -4,10 +4,30 @@ Core rule evaluation engine for eBay Smart Bid Controller.
 Processes bidding rules and generates recommendations.
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator, Mapping, TYPE_CHECKING
 from enum import Enum
-import pandas as pd
+import numpy as np
+
+from .conditions import compile_predicate, polars_functions, polars_mask, unsafe_row_checks, polars_unsafe_rows
+
+if TYPE_CHECKING:
+    # Only needed for annotations; keeps `main.py rules` from importing pandas
+    import pandas as pd
+
+# Shared globals for condition evaluation; metrics are passed as locals
+_SAFE_GLOBALS = {
+    '__builtins__': {},
+    'min': min,
+    'max': max,
+    'abs': abs
+}
+
+# Names available to conditions, in the order metrics are reported
+_METRIC_NAMES = (
+    'ad_spend', 'sales', 'revenue', 'clicks', 'impressions', 'acos', 'ctr', 'cpc', 'current_bid'
+)
 
 class BidAction(Enum):
     """Possible bid adjustment actions."""
@@ -24,21 +44,80 @@ class Rule:
     action: BidAction
     adjustment_percent: Optional[float] = None
     explanation_template: str = ""
+    _compiled: Optional[CodeType] = field(init=False, repr=False, compare=False)
+    _predicate: Optional[Callable[[Mapping[str, Any]], Any]] = field(init=False, repr=False, compare=False)
+    _unsafe_checks: List[Callable[[Mapping[str, Any]], Any]] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Compile the condition once instead of on every evaluation. eval() strips
+        # leading whitespace, so compile the stripped text to accept the same conditions
+        try:
+            self._compiled = compile(self.condition.strip(), f"<rule:{self.name}>", "eval")
+        except SyntaxError:
+            # Reported and treated as unmatched when the rule is evaluated
+            self._compiled = None
+            self._predicate = None
+            self._unsafe_checks = []
+            return
+        try:
+            self._predicate = compile_predicate(self.condition)
+            self._unsafe_checks = unsafe_row_checks(self.condition)
+        except ValueError:
+            # Evaluated row by row instead
+            self._predicate = None
+            self._unsafe_checks = []
     
     def get_explanation(self, **kwargs) -> str:
         """Generate human-readable explanation for the rule action."""
-        return self.explanation_template.format(**kwargs)
+        return self.explain(kwargs)
+    
+    def explain(self, metrics: Mapping[str, Any]) -> str:
+        """Generate the explanation straight from a metrics mapping, without unpacking it."""
+        return self.explanation_template.format_map(metrics)
+
+@dataclass
+class Metrics:
+    """
+    Performance metrics for a single campaign/SKU.
+    Slotted to keep per-row objects small; also readable as a mapping
+    so it can be used as eval locals and in explanation templates.
+    """
+    __slots__ = _METRIC_NAMES
+    ad_spend: float
+    sales: float
+    revenue: float
+    clicks: int
+    impressions: int
+    acos: float
+    ctr: float
+    cpc: float
+    current_bid: float
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a metric by name, or default if there is no such metric."""
+        return getattr(self, key, default)
+    
+    def keys(self) -> Tuple[str, ...]:
+        """Metric names, in reporting order."""
+        return _METRIC_NAMES
 
 @dataclass
 class BidRecommendation:
     """Recommendation for a specific campaign/SKU."""
+    __slots__ = ('campaign_id', 'sku', 'current_bid', 'recommended_bid', 'action', 'reason', 'metrics')
     campaign_id: str
     sku: str
     current_bid: float
     recommended_bid: float
     action: BidAction
     reason: str
-    metrics: Dict[str, Any]
+    metrics: Metrics
 
 class RuleEngine:
     """Main engine for evaluating bidding rules."""
@@ -86,46 +165,162 @@ class RuleEngine:
             )
         ]
     
-    def evaluate_row(self, row: pd.Series) -> Optional[BidRecommendation]:
+    def evaluate_row(self, row: Any) -> Optional[BidRecommendation]:
         """
         Evaluate a single row of data against all rules.
+        The row may be a Series, a dict or an itertuples() namedtuple.
         Returns the first matching rule's recommendation.
         """
-        # Calculate metrics
-        metrics = self._calculate_metrics(row)
+        # One conversion up front; Series.get hashes and checks the index per call.
+        # Namedtuples from DataFrame.itertuples(index=False) are accepted as well
+        if hasattr(row, '_asdict'):
+            values = row._asdict()
+        elif hasattr(row, 'to_dict'):
+            values = row.to_dict()
+        else:
+            values = row
+        campaign_id = values.get('campaign_id', 'Unknown')
+        sku = values.get('sku', 'Unknown')
+        metrics = self._calculate_metrics(values)
         
         # Evaluate each rule
         for rule in self.rules:
-            if self._evaluate_condition(rule.condition, metrics):
-                return self._create_recommendation(row, rule, metrics)
+            if self._evaluate_condition(rule, metrics):
+                return self._create_recommendation(campaign_id, sku, rule, metrics)
         
         # No rule matched
         return BidRecommendation(
-            campaign_id=row.get('campaign_id', 'Unknown'),
-            sku=row.get('sku', 'Unknown'),
-            current_bid=row.get('current_bid', 0),
-            recommended_bid=row.get('current_bid', 0),
+            campaign_id=campaign_id,
+            sku=sku,
+            current_bid=values.get('current_bid', 0),
+            recommended_bid=values.get('current_bid', 0),
             action=BidAction.NO_CHANGE,
             reason="No rules matched - maintaining current bid",
             metrics=metrics
         )
     
-    def _calculate_metrics(self, row: pd.Series) -> Dict[str, Any]:
-        """Calculate key metrics from row data."""
-        ad_spend = float(row.get('ad_spend', 0))
-        sales = float(row.get('sales', 0))
-        revenue = float(row.get('revenue', 0))
-        clicks = int(row.get('clicks', 0))
-        impressions = int(row.get('impressions', 0))
+    def evaluate_frame(self, data: 'pd.DataFrame') -> List[BidRecommendation]:
+        """
+        Evaluate every row of a DataFrame against all rules at once.
+        Returns recommendations for matched rows only, in row order,
+        with the same first-match priority as evaluate_row.
+        """
+        metrics = self._calculate_metric_arrays(data)
+        return self._build_recommendations(data, metrics, self._match_rules(metrics, len(data)))
+    
+    def evaluate_frame_polars(self, data: 'pd.DataFrame') -> List[BidRecommendation]:
+        """
+        Same as evaluate_frame, but computes the derived metrics and matches
+        rules in one lazy Polars plan. Requires polars. Rows where a condition
+        would divide by zero or see NaN are matched by evaluate_frame's rule
+        chain, since Polars carries on where Python raises or compares NaN as
+        the largest value; rule sets that cannot be lowered to Polars are
+        evaluated by evaluate_frame entirely.
+        """
+        import polars as pl
         
-        # Calculate ACOS (Advertising Cost of Sale)
-        acos = (ad_spend / revenue * 100) if revenue > 0 else float('inf')
+        if any(rule._predicate is None for rule in self.rules):
+            return self.evaluate_frame(data)
         
-        # Calculate CTR (Click-Through Rate)
-        ctr = (clicks / impressions * 100) if impressions > 0 else 0
+        # Only the metric columns are handed to Polars, converted as in
+        # _calculate_metric_arrays; ID columns of any type stay in pandas
+        base = self._calculate_metric_arrays(data)
+        ad_spend, sales, revenue = pl.col('ad_spend'), pl.col('sales'), pl.col('revenue')
+        clicks, impressions = pl.col('clicks'), pl.col('impressions')
+        metric_columns = {name: pl.col(name) for name in _METRIC_NAMES}
+        functions = polars_functions()
         
-        # Calculate CPC (Cost Per Click)
-        cpc = (ad_spend / clicks) if clicks > 0 else 0
+        try:
+            # First matching rule wins, as in evaluate_row
+            matched_rule = pl.lit(-1)
+            unsafe = pl.lit(False)
+            for i in reversed(range(len(self.rules))):
+                condition = self.rules[i].condition
+                predicate = polars_mask(compile_predicate(condition, functions, polars_mask)(metric_columns))
+                if not isinstance(predicate, pl.Expr):
+                    predicate = pl.lit(bool(predicate))
+                matched_rule = pl.when(predicate).then(pl.lit(i)).otherwise(matched_rule)
+                unsafe = unsafe | polars_unsafe_rows(condition, metric_columns, functions)
+            
+            frame = pl.LazyFrame({
+                name: base[name] for name in ('ad_spend', 'sales', 'revenue', 'clicks', 'impressions', 'current_bid')
+            }).with_columns(
+                pl.when(revenue > 0).then(ad_spend / revenue * 100).otherwise(float('inf')).alias('acos'),
+                pl.when(impressions > 0).then(clicks / impressions * 100).otherwise(0.0).alias('ctr'),
+                pl.when(clicks > 0).then(ad_spend / clicks).otherwise(0.0).alias('cpc')
+            ).with_columns(
+                matched_rule.alias('_matched_rule'),
+                unsafe.fill_null(True).alias('_unsafe')
+            ).collect()
+        except Exception:
+            return self.evaluate_frame(data)
+        
+        metrics = {name: frame[name].to_numpy() for name in _METRIC_NAMES}
+        rule_index = frame['_matched_rule'].to_numpy().astype(np.int64)
+        unsafe_rows = np.flatnonzero(frame['_unsafe'].to_numpy())
+        if unsafe_rows.size:
+            rule_index[unsafe_rows] = self._match_rules(
+                {name: values[unsafe_rows] for name, values in metrics.items()}, unsafe_rows.size
+            )
+        return self._build_recommendations(data, metrics, rule_index)
+    
+    def _match_rules(self, metrics: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        """Index of the first matching rule for every row, or -1 where no rule matches."""
+        # Each rule only sees rows not matched by a higher-priority rule, so
+        # later rules work on a shrinking set of positions
+        matched_rule = np.full(n, -1)
+        remaining = np.arange(n)
+        for i, rule in enumerate(self.rules):
+            if remaining.size == 0:
+                break
+            subset = metrics if remaining.size == n else _RowSubset(metrics, remaining)
+            mask = self._evaluate_condition_array(rule, subset, remaining.size)
+            matched_rule[remaining[mask]] = i
+            remaining = remaining[~mask]
+        return matched_rule
+    
+    def _build_recommendations(self, data: 'pd.DataFrame', metrics: Dict[str, np.ndarray],
+                               matched_rule: np.ndarray) -> List[BidRecommendation]:
+        """Create recommendations for the rows with a matching rule, in row order."""
+        matched = np.flatnonzero(matched_rule >= 0)
+        campaign_ids = self._column_values(data, 'campaign_id', matched)
+        skus = self._column_values(data, 'sku', matched)
+        
+        rule_index = matched_rule[matched]
+        new_bids = self._calculate_new_bids(rule_index, metrics['current_bid'][matched]).tolist()
+        
+        return [
+            self._create_recommendation(campaign_id, sku, self.rules[i], row_metrics, new_bid)
+            for campaign_id, sku, i, row_metrics, new_bid in zip(
+                campaign_ids, skus, rule_index.tolist(), self._metric_rows(metrics, matched), new_bids
+            )
+        ]
+    
+    @staticmethod
+    def _metric_rows(metrics: Mapping[str, np.ndarray], rows: np.ndarray) -> Iterator[Metrics]:
+        """
+        Metrics for the given row positions. Each column is converted to Python
+        values once with tolist() rather than with an .item() call per value.
+        """
+        return map(Metrics, *(metrics[name][rows].tolist() for name in _METRIC_NAMES))
+    
+    def _calculate_metric_arrays(self, data: 'pd.DataFrame') -> Dict[str, np.ndarray]:
+        """Calculate key metrics for every row as NumPy arrays."""
+        def column(name, dtype):
+            if name not in data.columns:
+                return np.zeros(len(data), dtype=dtype)
+            return data[name].to_numpy(dtype=float).astype(dtype)
+        
+        ad_spend = column('ad_spend', np.float64)
+        sales = column('sales', np.float64)
+        revenue = column('revenue', np.float64)
+        clicks = column('clicks', np.int64)
+        impressions = column('impressions', np.int64)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acos = np.where(revenue > 0, ad_spend / revenue * 100, np.inf)
+            ctr = np.where(impressions > 0, clicks / impressions * 100, 0.0)
+            cpc = np.where(clicks > 0, ad_spend / clicks, 0.0)
         
         return {
             'ad_spend': ad_spend,
@@ -136,56 +331,140 @@ class RuleEngine:
             'acos': acos,
             'ctr': ctr,
             'cpc': cpc,
-            'current_bid': float(row.get('current_bid', 0))
+            'current_bid': column('current_bid', np.float64)
         }
     
-    def _evaluate_condition(self, condition: str, metrics: Dict[str, Any]) -> bool:
+    @staticmethod
+    def _column_values(data: 'pd.DataFrame', name: str, positions: np.ndarray) -> List[Any]:
+        """Get values of a column at the given positions, or 'Unknown' if missing."""
+        if name not in data.columns:
+            return ['Unknown'] * len(positions)
+        return data[name].iloc[positions].tolist()
+    
+    def _calculate_metrics(self, row: Mapping[str, Any]) -> Metrics:
+        """Calculate key metrics from row data."""
+        ad_spend = float(row.get('ad_spend', 0))
+        sales = float(row.get('sales', 0))
+        revenue = float(row.get('revenue', 0))
+        clicks = int(row.get('clicks', 0))
+        impressions = int(row.get('impressions', 0))
+        
+        # Calculate ACOS (Advertising Cost of Sale)
+        acos = (ad_spend / revenue * 100) if revenue > 0 else float('inf')
+        
+        # Calculate CTR (Click-Through Rate)
+        ctr = (clicks / impressions * 100) if impressions > 0 else 0.0
+        
+        # Calculate CPC (Cost Per Click)
+        cpc = (ad_spend / clicks) if clicks > 0 else 0.0
+        
+        return Metrics(
+            ad_spend=ad_spend,
+            sales=sales,
+            revenue=revenue,
+            clicks=clicks,
+            impressions=impressions,
+            acos=acos,
+            ctr=ctr,
+            cpc=cpc,
+            current_bid=float(row.get('current_bid', 0))
+        )
+    
+    def _evaluate_condition(self, rule: Rule, metrics: Mapping[str, Any]) -> bool:
         """
-        Safely evaluate a condition string against metrics.
+        Safely evaluate a rule's pre-compiled condition against metrics.
         Uses Python's eval with restricted namespace for safety.
         """
         try:
-            # Create safe namespace with only metrics and comparison functions
-            safe_namespace = {
-                **metrics,
-                '__builtins__': {},
-                'min': min,
-                'max': max,
-                'abs': abs
-            }
-            return eval(condition, safe_namespace)
+            # Conditions that failed to compile raise their SyntaxError here
+            code = rule.condition if rule._compiled is None else rule._compiled
+            return eval(code, _SAFE_GLOBALS, metrics)
         except Exception as e:
-            print(f"Error evaluating condition '{condition}': {e}")
+            print(f"Error evaluating condition '{rule.condition}': {e}")
             return False
     
-    def _create_recommendation(self, row: pd.Series, rule: Rule, metrics: Dict[str, Any]) -> BidRecommendation:
-        """Create a bid recommendation based on a matching rule."""
-        current_bid = metrics['current_bid']
-        
-        # Calculate new bid based on action
-        if rule.action == BidAction.INCREASE:
-            new_bid = current_bid * (1 + rule.adjustment_percent / 100)
-        elif rule.action == BidAction.DECREASE:
-            new_bid = current_bid * (1 + rule.adjustment_percent / 100)
-            new_bid = max(new_bid, 0.01)  # Ensure bid doesn't go below minimum
-        elif rule.action == BidAction.PAUSE:
-            new_bid = 0
-        else:
-            new_bid = current_bid
+    def _evaluate_condition_array(self, rule: Rule, metrics: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        """
+        Evaluate a rule's condition against metric arrays, returning a boolean mask.
+        Rows where NumPy and Python disagree (see unsafe_row_checks) are
+        re-evaluated one by one, so a division by zero leaves the row unmatched
+        as in evaluate_row. Conditions that cannot be vectorized run row by row.
+        """
+        try:
+            if rule._predicate is not None:
+                with np.errstate(all='ignore'):
+                    mask = np.broadcast_to(np.asarray(rule._predicate(metrics), dtype=bool), (n,)).copy()
+                    unsafe = np.zeros(n, dtype=bool)
+                    for check in rule._unsafe_checks:
+                        unsafe |= np.broadcast_to(np.asarray(check(metrics), dtype=bool), (n,))
+                rows = np.flatnonzero(unsafe)
+                if rows.size:
+                    mask[rows] = self._evaluate_condition_rows(rule, metrics, rows)
+                return mask
+        except Exception:
+            pass
+        return self._evaluate_condition_rows(rule, metrics, np.arange(n))
+    
+    def _evaluate_condition_rows(self, rule: Rule, metrics: Dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+        """Evaluate a rule's condition one row at a time for the given row positions."""
+        return np.fromiter(
+            (self._evaluate_condition(rule, row_metrics) for row_metrics in self._metric_rows(metrics, rows)),
+            dtype=bool, count=rows.size
+        )
+    
+    def _create_recommendation(self, campaign_id: str, sku: str, rule: Rule, metrics: Metrics,
+                               new_bid: Optional[float] = None) -> BidRecommendation:
+        """
+        Create a bid recommendation based on a matching rule.
+        new_bid can be passed in when it was already computed for many rows at once.
+        """
+        current_bid = metrics.current_bid
+        
+        if new_bid is None:
+            # Calculate new bid based on action
+            if rule.action == BidAction.INCREASE:
+                new_bid = current_bid * (1 + rule.adjustment_percent / 100)
+            elif rule.action == BidAction.DECREASE:
+                new_bid = current_bid * (1 + rule.adjustment_percent / 100)
+                new_bid = max(new_bid, 0.01)  # Ensure bid doesn't go below minimum
+            elif rule.action == BidAction.PAUSE:
+                new_bid = 0.0
+            else:
+                new_bid = current_bid
         
         # Generate explanation
-        explanation = rule.get_explanation(**metrics)
+        explanation = rule.explain(metrics)
         
         return BidRecommendation(
-            campaign_id=row.get('campaign_id', 'Unknown'),
-            sku=row.get('sku', 'Unknown'),
+            campaign_id=campaign_id,
+            sku=sku,
             current_bid=current_bid,
+            # round() rather than np.round, which is off by a cent for values like 4.365
             recommended_bid=round(new_bid, 2),
             action=rule.action,
             reason=explanation,
             metrics=metrics
         )
     
+    def _calculate_new_bids(self, rule_index: np.ndarray, current_bid: np.ndarray) -> np.ndarray:
+        """
+        Compute unrounded recommended bids for rows matched by the given rule
+        indices. Each rule's action is encoded as an adjustment, a minimum bid
+        and a pause flag, so all rows are priced with the same array expression.
+        """
+        adjustment = np.array([
+            (rule.adjustment_percent or 0) if rule.action in (BidAction.INCREASE, BidAction.DECREASE) else 0
+            for rule in self.rules
+        ], dtype=float)[rule_index]
+        # Decreases must not go below the minimum bid
+        minimum = np.array([
+            0.01 if rule.action == BidAction.DECREASE else -np.inf
+            for rule in self.rules
+        ])[rule_index]
+        pause = np.array([rule.action == BidAction.PAUSE for rule in self.rules], dtype=bool)[rule_index]
+        
+        return np.where(pause, 0.0, np.maximum(current_bid * (1 + adjustment / 100), minimum))
+    
     def add_custom_rule(self, rule: Rule):
         """Add a custom rule to the engine."""
         self.rules.append(rule)
@@ -204,4 +483,16 @@ class RuleEngine:
                 'adjustment': f"{rule.adjustment_percent:+.0f}%" if rule.adjustment_percent else "N/A"
             }
             for rule in self.rules
-        ]
\ No newline at end of file
+        ]
+
+class _RowSubset(dict):
+    """Metric columns restricted to some row positions, sliced only when a rule reads them."""
+    
+    def __init__(self, columns: Mapping[str, np.ndarray], rows: np.ndarray):
+        super().__init__()
+        self._columns = columns
+        self._rows = rows
+    
+    def __missing__(self, name: str) -> np.ndarray:
+        value = self[name] = self._columns[name][self._rows]
+        return value
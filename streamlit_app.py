@@ -7,9 +7,8 @@ Upload your eBay Keyword and Query reports for bid optimization and negative key
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import io
-import base64
+from typing import NamedTuple
 
 # Page config
 st.set_page_config(
@@ -27,6 +26,8 @@ if 'bid_recommendations' not in st.session_state:
     st.session_state.bid_recommendations = None
 if 'negative_keywords' not in st.session_state:
     st.session_state.negative_keywords = None
+if 'action_index' not in st.session_state:
+    st.session_state.action_index = None
 
 # Title and description
 st.title("🎯 eBay Smart Bid Controller")
@@ -67,38 +68,41 @@ with st.sidebar:
 # Main content area
 tab1, tab2, tab3 = st.tabs(["📤 Upload Reports", "📊 Bid Adjustments", "🚫 Negative Keywords"])
 
-def clean_currency(value):
-    """Clean currency strings to float"""
-    if pd.isna(value):
-        return 0.0
-    if isinstance(value, str):
-        return float(value.replace('$', '').replace(',', '').strip())
-    return float(value)
+def clean_currency_column(series):
+    """Clean a whole column of currency strings to float"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0)
+    cleaned = series.astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0)
 
-def clean_percentage(value):
-    """Clean percentage strings to float"""
-    if pd.isna(value):
-        return 0.0
-    if isinstance(value, str):
-        return float(value.replace('%', '').strip())
-    return float(value)
+def calculate_acos(ad_fees, sales):
+    """ACOS (%) per row; 999 when there is spend but no sales, 0 when neither"""
+    ad_fees = ad_fees.to_numpy(dtype=float)
+    sales = sales.to_numpy(dtype=float)
+    has_sales = sales > 0
+    return np.where(
+        has_sales,
+        ad_fees / np.where(has_sales, sales, 1) * 100,
+        np.where(ad_fees > 0, 999, 0)
+    )
+
+# Wide free-text columns, stored as Arrow strings instead of Python objects
+TEXT_COLS = ['Seller Keyword', 'Search Query']
+
+# Columns with a handful of distinct values, stored as categoricals
+CATEGORY_COLS = ['Status', 'Keyword Match Type']
+
+def store_text_as_arrow(df):
+    """Convert object-dtype text columns to string[pyarrow] in place (pandas 3 already uses Arrow strings)"""
+    for col in TEXT_COLS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('string[pyarrow]')
 
 def process_keyword_report(df):
     """Process and clean keyword report"""
-    # Skip warning header if present
-    if len(df) > 0 and 'Some details' in str(df.iloc[0, 0]):
-        df = df.iloc[2:]
-        df.columns = df.iloc[0]
-        df = df.iloc[1:]
-        df.reset_index(drop=True, inplace=True)
-    
-    # Create a standardized dataframe with consistent column names
-    processed_df = pd.DataFrame()
-    
-    # Map all columns, stripping whitespace
-    for col in df.columns:
-        col_clean = str(col).strip()
-        processed_df[col_clean] = df[col].values
+    # Standardize column names in one rename, stripping whitespace
+    processed_df = df.rename(columns=lambda col: str(col).strip())
+    store_text_as_arrow(processed_df)
     
     # ===== CRITICAL FIX: Map eBay column names =====
     column_map = {
@@ -107,160 +111,232 @@ def process_keyword_report(df):
     }
     processed_df = processed_df.rename(columns=column_map)
     
-    # Ensure numeric columns are numeric
+    # Ensure numeric columns are numeric; whole counts shrink to the smallest int type
     numeric_cols = ['Impressions', 'Clicks', 'Sold quantity']
     for col in numeric_cols:
         if col in processed_df.columns:
-            processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            counts = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            processed_df[col] = pd.to_numeric(counts, downcast='integer')
     
     # Clean currency columns - THIS IS THE KEY FIX
     currency_cols = ['Bid', 'Ad fees', 'Sales', 'Average cost per click', 'Average cost per sale']
     for col in currency_cols:
         if col in processed_df.columns:
-            # Remove $ and commas, then convert to float
-            processed_df[col] = processed_df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
-            processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            # Remove $ and commas, then convert to float (already numeric columns pass through)
+            processed_df[col] = clean_currency_column(processed_df[col])
     
     # Add calculated columns
     processed_df['ACOS'] = 0
     processed_df['CTR_calc'] = 0
     
     if 'Sales' in processed_df.columns and 'Ad fees' in processed_df.columns:
-        processed_df['ACOS'] = processed_df.apply(
-            lambda row: (row['Ad fees'] / row['Sales'] * 100) if row['Sales'] > 0 
-            else (999 if row['Ad fees'] > 0 else 0), axis=1
-        )
+        processed_df['ACOS'] = calculate_acos(processed_df['Ad fees'], processed_df['Sales'])
     
     if 'Clicks' in processed_df.columns and 'Impressions' in processed_df.columns:
-        processed_df['CTR_calc'] = processed_df.apply(
-            lambda row: (row['Clicks'] / row['Impressions'] * 100) if row['Impressions'] > 0 
-            else 0, axis=1
-        )
+        clicks = processed_df['Clicks'].to_numpy(dtype=float)
+        impressions = processed_df['Impressions'].to_numpy(dtype=float)
+        processed_df['CTR_calc'] = np.divide(
+            clicks, impressions, out=np.zeros_like(clicks), where=impressions > 0
+        ) * 100
     
     # Ensure Status column exists
     if 'Status' not in processed_df.columns:
         processed_df['Status'] = 'Active'
     
+    for col in CATEGORY_COLS:
+        if col in processed_df.columns:
+            processed_df[col] = processed_df[col].astype('category')
+    
     return processed_df
 
 def process_query_report(df):
     """Process and clean query report"""
-    # Skip warning header if present
-    if len(df) > 0 and 'Some details' in str(df.iloc[0, 0]):
-        df = df.iloc[2:]
-        df.columns = df.iloc[0]
-        df = df.iloc[1:]
-        df.reset_index(drop=True, inplace=True)
-    
-    # Create a standardized dataframe with consistent column names
-    processed_df = pd.DataFrame()
-    
-    # Map all columns, stripping whitespace
-    for col in df.columns:
-        col_clean = str(col).strip()
-        processed_df[col_clean] = df[col].values
-    
-    # Ensure numeric columns are numeric
+    # Standardize column names in one rename, stripping whitespace
+    processed_df = df.rename(columns=lambda col: str(col).strip())
+    store_text_as_arrow(processed_df)
+    
+    # Ensure numeric columns are numeric; whole counts shrink to the smallest int type
     numeric_cols = ['Impressions', 'Clicks', 'Sold quantity']
     for col in numeric_cols:
         if col in processed_df.columns:
-            processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            counts = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            processed_df[col] = pd.to_numeric(counts, downcast='integer')
     
     # Clean currency columns - THE FIX
     currency_cols = ['Keyword Bid', 'Ad fees', 'Sales']
     for col in currency_cols:
         if col in processed_df.columns:
-            # Remove $ and commas, then convert to float
-            processed_df[col] = processed_df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
-            processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce').fillna(0)
+            # Remove $ and commas, then convert to float (already numeric columns pass through)
+            processed_df[col] = clean_currency_column(processed_df[col])
     
     # Add ACOS calculation
     processed_df['ACOS'] = 0
     if 'Sales' in processed_df.columns and 'Ad fees' in processed_df.columns:
-        processed_df['ACOS'] = processed_df.apply(
-            lambda row: (row['Ad fees'] / row['Sales'] * 100) if row['Sales'] > 0 
-            else (999 if row['Ad fees'] > 0 else 0), axis=1
-        )
+        processed_df['ACOS'] = calculate_acos(processed_df['Ad fees'], processed_df['Sales'])
     
     return processed_df
 
+def report_header_row(file_bytes):
+    """Line number of the column header: 3 when eBay's "Some details" warning banner is present"""
+    lines = file_bytes[:1024].split(b'\n', 2)
+    if len(lines) > 1 and b'Some details' in lines[1].split(b',', 1)[0]:
+        return 3
+    return 0
+
+def read_report_csv(file_bytes):
+    """Read report CSV bytes with pyarrow's multi-threaded parser, falling back to the default engine"""
+    # Skip warning header if present, so the file is parsed once with the right columns
+    # (header= rather than skiprows=, which the pyarrow engine applies after the header)
+    header = report_header_row(file_bytes)
+    try:
+        return pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow', header=header)
+    except Exception:
+        # pyarrow missing, or a file it rejects
+        return pd.read_csv(io.BytesIO(file_bytes), header=header)
+
+@st.cache_data(show_spinner=False)
+def load_keyword_report(file_bytes):
+    """Parse and process an uploaded keyword report, cached on the file contents"""
+    return process_keyword_report(read_report_csv(file_bytes))
+
+@st.cache_data(show_spinner=False)
+def load_query_report(file_bytes):
+    """Parse and process an uploaded query report, cached on the file contents"""
+    return process_query_report(read_report_csv(file_bytes))
+
+class AnalysisConfig(NamedTuple):
+    """Sidebar thresholds for an analysis; a tuple, so st.cache_data hashes it by value"""
+    acos_good: float
+    acos_poor: float
+    min_impressions_for_ctr: float
+    min_clicks_no_sales: float
+    pause_spend: float
+    increase_percent: float
+    decrease_percent: float
+    waste_threshold: float
+
+# Action taken by each bid rule, in priority order
+BID_ACTIONS = np.array(['PAUSE', 'INCREASE', 'DECREASE', 'INCREASE', 'DECREASE'])
+
+@st.cache_data(show_spinner=False)
 def generate_bid_recommendations(keyword_df, config):
     """Generate bid adjustment recommendations"""
-    recommendations = []
-    
-    for _, row in keyword_df.iterrows():
-        # Skip inactive keywords
-        if 'Status' in row and row['Status'] != 'Active':
-            continue
-        
-        # Get values with defaults if columns don't exist
-        current_bid = row.get('Bid', 0)
-        impressions = row.get('Impressions', 0)
-        clicks = row.get('Clicks', 0)
-        sales = row.get('Sold quantity', 0)
-        ad_fees = row.get('Ad fees', 0)
-        revenue = row.get('Sales', 0)
-        acos = row.get('ACOS', 0)
-        ctr = row.get('CTR_calc', 0)
-        keyword = row.get('Seller Keyword', 'Unknown')
-        match_type = row.get('Keyword Match Type', 'Unknown')
-        ad_group = row.get('Ad Group Name', 'Unknown')  # Add AdGroup
-        
-        action = None
-        reason = ""
-        new_bid = current_bid
-        
+    # Skip inactive keywords
+    if 'Status' in keyword_df.columns:
+        keyword_df = keyword_df[keyword_df['Status'] == 'Active']
+    
+    # Get values with defaults if columns don't exist
+    def column(name, default):
+        if name in keyword_df.columns:
+            return keyword_df[name].to_numpy()
+        return np.full(len(keyword_df), default)
+    
+    current_bid = column('Bid', 0)
+    impressions = column('Impressions', 0)
+    clicks = column('Clicks', 0)
+    sales = column('Sold quantity', 0)
+    ad_fees = column('Ad fees', 0)
+    revenue = column('Sales', 0)
+    acos = column('ACOS', 0)
+    ctr = column('CTR_calc', 0)
+    
+    increase = 1 + config.increase_percent / 100
+    decrease = 1 - config.decrease_percent / 100
+    
+    increased_bid = current_bid * increase
+    decreased_bid = current_bid * decrease
+    
+    # Rules in priority order; np.select picks the first that matches
+    rules = [
         # Rule 1: Pause if high spend with no sales
-        if ad_fees >= config['pause_spend'] and sales == 0:
-            action = "PAUSE"
-            new_bid = 0
-            reason = f"Spent ${ad_fees:.2f} with 0 sales"
-        
+        ((ad_fees >= config.pause_spend) & (sales == 0), 0),
         # Rule 2: Low CTR (lots of impressions, no clicks)
-        elif impressions >= config['min_impressions_for_ctr'] and clicks == 0:
-            action = "INCREASE"
-            new_bid = current_bid * (1 + config['increase_percent'] / 100)
-            reason = f"{int(impressions)} impressions with 0 clicks - bid may be too low"
-        
+        ((impressions >= config.min_impressions_for_ctr) & (clicks == 0), increased_bid),
         # Rule 3: High clicks but no sales
-        elif clicks >= config['min_clicks_no_sales'] and sales == 0:
-            action = "DECREASE"
-            new_bid = current_bid * (1 - config['decrease_percent'] / 100)
-            reason = f"{int(clicks)} clicks with 0 sales - reduce spend"
-        
+        ((clicks >= config.min_clicks_no_sales) & (sales == 0), decreased_bid),
         # Rule 4: Good ACOS - increase to get more volume
-        elif acos < config['acos_good'] and sales > 0:
-            action = "INCREASE"
-            new_bid = current_bid * (1 + config['increase_percent'] / 100)
-            reason = f"ACOS {acos:.1f}% is excellent - scale up"
-        
+        ((acos < config.acos_good) & (sales > 0), increased_bid),
         # Rule 5: Poor ACOS - decrease to improve profitability
-        elif acos > config['acos_poor'] and sales > 0:
-            action = "DECREASE"
-            new_bid = current_bid * (1 - config['decrease_percent'] / 100)
-            reason = f"ACOS {acos:.1f}% is too high - reduce bid"
-        
-        if action:
-            recommendations.append({
-                'Ad Group': ad_group,  # Add AdGroup as first column
-                'Keyword': keyword,
-                'Match Type': match_type,
-                'Current Bid': current_bid,
-                'New Bid': round(new_bid, 2),
-                'Action': action,
-                'Change ($)': round(new_bid - current_bid, 2),
-                'Reason': reason,
-                'Impressions': int(impressions),
-                'Clicks': int(clicks),
-                'Sales': int(sales),
-                'Ad Spend': round(ad_fees, 2),
-                'Revenue': round(revenue, 2),
-                'ACOS (%)': round(acos, 1) if acos < 999 else 'N/A',
-                'CTR (%)': round(ctr, 2)
-            })
-    
-    return pd.DataFrame(recommendations)
+        ((acos > config.acos_poor) & (sales > 0), decreased_bid),
+    ]
+    conditions = [condition for condition, _ in rules]
+    rule_index = np.select(conditions, np.arange(len(rules)), default=-1)
+    new_bid = np.select(conditions, [bid for _, bid in rules], default=current_bid)
+    
+    matched = rule_index >= 0
+    if not matched.any():
+        return pd.DataFrame()
+    
+    rule_index = rule_index[matched]
+    new_bid = new_bid[matched]
+    action = BID_ACTIONS[rule_index]
+    
+    current_bid, impressions, clicks, sales = current_bid[matched], impressions[matched], clicks[matched], sales[matched]
+    ad_fees, revenue, acos, ctr = ad_fees[matched], revenue[matched], acos[matched], ctr[matched]
+    
+    # printf-style templates, filled in one rule at a time from plain Python values
+    reason_templates = [
+        ("Spent $%.2f with 0 sales", ad_fees),
+        ("%d impressions with 0 clicks - bid may be too low", impressions),
+        ("%d clicks with 0 sales - reduce spend", clicks),
+        ("ACOS %.1f%% is excellent - scale up", acos),
+        ("ACOS %.1f%% is too high - reduce bid", acos),
+    ]
+    reason = np.empty(len(rule_index), dtype=object)
+    for rule, (template, values) in enumerate(reason_templates):
+        in_rule = rule_index == rule
+        if in_rule.any():
+            reason[in_rule] = [template % value for value in values[in_rule].tolist()]
+    
+    def rounded(values, digits):
+        # Built-in round() per value; np.round differs on ties such as 0.7 * 0.85
+        return [round(value, digits) for value in values.tolist()]
+    
+    def text_column(name):
+        if name in keyword_df.columns:
+            return keyword_df[name].to_numpy()[matched]
+        return 'Unknown'
+    
+    acos_rounded = pd.Series(rounded(acos, 1), dtype=object)
+    
+    return pd.DataFrame({
+        'Ad Group': text_column('Ad Group Name'),  # Add AdGroup as first column
+        'Keyword': text_column('Seller Keyword'),
+        'Match Type': text_column('Keyword Match Type'),
+        'Current Bid': current_bid,
+        'New Bid': rounded(new_bid, 2),
+        'Action': action,
+        'Change ($)': rounded(new_bid - current_bid, 2),
+        'Reason': reason,
+        'Impressions': impressions.astype(int),
+        'Clicks': clicks.astype(int),
+        'Sales': sales.astype(int),
+        'Ad Spend': rounded(ad_fees, 2),
+        'Revenue': rounded(revenue, 2),
+        'ACOS (%)': acos_rounded.where(acos < 999, 'N/A'),
+        'CTR (%)': rounded(ctr, 2)
+    })
 
+def find_money_wasters_polars(query_df, sum_cols, waste_threshold):
+    """Per-query totals with spend but no sales; None if Polars is not installed"""
+    try:
+        import polars as pl
+    except ImportError:
+        return None
+    
+    return (
+        pl.from_pandas(query_df[['Search Query'] + sum_cols])
+        .lazy()
+        .drop_nulls('Search Query')  # pandas' groupby drops missing keys too
+        .group_by('Search Query')
+        # Totals are money, so compare cents: the float sums may be off in the last bit
+        .agg(pl.col(sum_cols).sum().round(2))
+        .filter((pl.col('Ad fees') >= waste_threshold) & (pl.col('Sales') == 0))
+        .collect()
+        .to_pandas()
+    )
+
+@st.cache_data(show_spinner=False)
 def find_negative_keywords(query_df, config):
     """Identify searches that waste money (cost money but generated $0 sales)"""
     
@@ -268,30 +344,35 @@ def find_negative_keywords(query_df, config):
     if 'Search Query' not in query_df.columns:
         return pd.DataFrame()
     
-    # Create aggregation dict for available columns
-    agg_dict = {}
-    if 'Impressions' in query_df.columns:
-        agg_dict['Impressions'] = 'sum'
-    if 'Clicks' in query_df.columns:
-        agg_dict['Clicks'] = 'sum'
-    if 'Ad fees' in query_df.columns:
-        agg_dict['Ad fees'] = 'sum'
-    if 'Sales' in query_df.columns:
-        agg_dict['Sales'] = 'sum'
-    if 'Sold quantity' in query_df.columns:
-        agg_dict['Sold quantity'] = 'sum'
-    
-    if not agg_dict:
-        return pd.DataFrame()
+    # Columns to total per search query
+    sum_cols = [
+        col for col in ['Impressions', 'Clicks', 'Ad fees', 'Sales', 'Sold quantity']
+        if col in query_df.columns
+    ]
     
-    # Group by search query
-    query_summary = query_df.groupby('Search Query').agg(agg_dict).reset_index()
+    if not sum_cols:
+        return pd.DataFrame()
     
-    # Find money wasters: searches that cost money but generated $0 sales
-    money_wasters = query_summary[
-        (query_summary.get('Ad fees', 0) >= config['waste_threshold']) &
-        (query_summary.get('Sales', 0) == 0)
-    ].copy()
+    # Polars runs the group/filter as one multi-threaded plan when installed
+    money_wasters = None
+    if 'Ad fees' in sum_cols and 'Sales' in sum_cols:
+        money_wasters = find_money_wasters_polars(query_df, sum_cols, config.waste_threshold)
+    
+    if money_wasters is None:
+        # Group by search query; only the few money wasters get sorted
+        query_summary = (
+            query_df[['Search Query'] + sum_cols]
+            .groupby('Search Query', sort=False, observed=True)
+            .sum()
+            .round(2)
+            .reset_index()
+        )
+        
+        # Find money wasters: searches that cost money but generated $0 sales
+        money_wasters = query_summary[
+            (query_summary.get('Ad fees', 0) >= config.waste_threshold) &
+            (query_summary.get('Sales', 0) == 0)
+        ]
     
     if len(money_wasters) == 0:
         return pd.DataFrame()
@@ -302,13 +383,13 @@ def find_negative_keywords(query_df, config):
         'Clicks': 'Clicks Paid For'
     })
     
-    # Sort by money wasted (most expensive first)
-    money_wasters = money_wasters.sort_values('Money Wasted', ascending=False)
-    
     # Select columns for output
     output_cols = ['Search Query', 'Money Wasted', 'Clicks Paid For']
+    money_wasters = money_wasters[output_cols]
     
-    return money_wasters[output_cols].round(2)
+    # Sort by money wasted (most expensive first), ties alphabetically. Sorting the
+    # rounded cents keeps the order stable when Polars' threaded sums differ in the last bit
+    return money_wasters.sort_values(['Money Wasted', 'Search Query'], ascending=[False, True])
 
 with tab1:
     st.header("📤 Upload Your eBay Reports")
@@ -328,8 +409,7 @@ with tab1:
         
         if keyword_file:
             try:
-                keyword_df = pd.read_csv(keyword_file)
-                keyword_df = process_keyword_report(keyword_df)
+                keyword_df = load_keyword_report(keyword_file.getvalue())
                 st.session_state.keyword_data = keyword_df
                 
                 # Show summary
@@ -359,8 +439,7 @@ with tab1:
         
         if query_file:
             try:
-                query_df = pd.read_csv(query_file)
-                query_df = process_query_report(query_df)
+                query_df = load_query_report(query_file.getvalue())
                 st.session_state.query_data = query_df
                 
                 # Show summary
@@ -384,19 +463,21 @@ with tab1:
             with st.spinner("Analyzing your campaign..."):
                 
                 # Generate bid recommendations
-                config = {
-                    'acos_good': acos_good,
-                    'acos_poor': acos_poor,
-                    'min_impressions_for_ctr': min_impressions_for_ctr,
-                    'min_clicks_no_sales': min_clicks_no_sales,
-                    'pause_spend': pause_spend,
-                    'increase_percent': increase_percent,
-                    'decrease_percent': decrease_percent,
-                    'waste_threshold': waste_threshold
-                }
+                config = AnalysisConfig(
+                    acos_good=acos_good,
+                    acos_poor=acos_poor,
+                    min_impressions_for_ctr=min_impressions_for_ctr,
+                    min_clicks_no_sales=min_clicks_no_sales,
+                    pause_spend=pause_spend,
+                    increase_percent=increase_percent,
+                    decrease_percent=decrease_percent,
+                    waste_threshold=waste_threshold
+                )
                 
                 bid_recs = generate_bid_recommendations(st.session_state.keyword_data, config)
                 st.session_state.bid_recommendations = bid_recs
+                # Row positions per action, in first-seen order, for the tab 2 filter
+                st.session_state.action_index = bid_recs.groupby('Action', sort=False).indices if not bid_recs.empty else {}
                 
                 # Find negative keywords
                 neg_keywords = find_negative_keywords(st.session_state.query_data, config)
@@ -405,30 +486,40 @@ with tab1:
                 st.success(f"✅ Analysis complete! Found {len(bid_recs)} bid adjustments and {len(neg_keywords)} negative keyword candidates")
                 st.balloons()
 
-with tab2:
-    st.header("📊 Bid Adjustment Recommendations")
-    
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """CSV export of a results table, cached so reruns don't re-serialize it"""
+    return df.to_csv(index=False).encode('utf-8')
+
+# Streamlit 1.37+ has st.fragment (1.33-1.36: experimental_fragment); older versions rerun the whole script
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+@fragment
+def bid_recommendations_panel():
+    """Bid recommendations tab; the action filter only reruns this panel"""
     if st.session_state.bid_recommendations is not None and not st.session_state.bid_recommendations.empty:
         
         # Summary metrics
         col1, col2, col3, col4 = st.columns(4)
         
         recs = st.session_state.bid_recommendations
+        # Counts come from the per-action row positions stored with the analysis
+        action_index = st.session_state.action_index
         
         with col1:
             total_recs = len(recs)
             st.metric("Total Adjustments", total_recs)
         
         with col2:
-            increases = len(recs[recs['Action'] == 'INCREASE'])
+            increases = len(action_index.get('INCREASE', ()))
             st.metric("⬆️ Increases", increases)
         
         with col3:
-            decreases = len(recs[recs['Action'] == 'DECREASE'])
+            decreases = len(action_index.get('DECREASE', ()))
             st.metric("⬇️ Decreases", decreases)
         
         with col4:
-            pauses = len(recs[recs['Action'] == 'PAUSE'])
+            pauses = len(action_index.get('PAUSE', ()))
             st.metric("⏸️ Pauses", pauses)
         
         st.divider()
@@ -436,11 +527,11 @@ with tab2:
         # Filter by action
         action_filter = st.selectbox(
             "Filter by action:",
-            ["All"] + list(recs['Action'].unique())
+            ["All"] + list(action_index)
         )
         
         if action_filter != "All":
-            filtered_recs = recs[recs['Action'] == action_filter]
+            filtered_recs = recs.iloc[action_index[action_filter]]
         else:
             filtered_recs = recs
         
@@ -459,14 +550,21 @@ with tab2:
         )
         
         # Download button
-        csv = filtered_recs.to_csv(index=False)
-        b64 = base64.b64encode(csv.encode()).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="bid_recommendations.csv">📥 Download Bid Recommendations</a>'
-        st.markdown(href, unsafe_allow_html=True)
+        st.download_button(
+            "📥 Download Bid Recommendations",
+            data=to_csv_bytes(filtered_recs),
+            file_name="bid_recommendations.csv",
+            mime="text/csv"
+        )
         
     else:
         st.info("👈 Upload both reports and click Analyze to see bid recommendations")
 
+with tab2:
+    st.header("📊 Bid Adjustment Recommendations")
+    
+    bid_recommendations_panel()
+
 with tab3:
     st.header("💸 Money Wasting Searches")
     
@@ -495,10 +593,12 @@ with tab3:
         )
         
         # Download button
-        csv = st.session_state.negative_keywords.to_csv(index=False)
-        b64 = base64.b64encode(csv.encode()).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="money_wasting_searches.csv">📥 Download List of Money Wasters</a>'
-        st.markdown(href, unsafe_allow_html=True)
+        st.download_button(
+            "📥 Download List of Money Wasters",
+            data=to_csv_bytes(st.session_state.negative_keywords),
+            file_name="money_wasting_searches.csv",
+            mime="text/csv"
+        )
         
         st.divider()
         
@@ -0,0 +1,143 @@
+"""Tests for the vectorized rule evaluation in src/rule_engine.py."""
+
+import contextlib
+import importlib.util
+import io
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.rule_engine import BidAction, Rule, RuleEngine
+
+
+def _report(n: int = 200, seed: int = 7) -> pd.DataFrame:
+    """Random report where about a fifth of the rows have no clicks or no sales."""
+    rng = np.random.default_rng(seed)
+    clicks = rng.integers(0, 40, n)
+    clicks[rng.random(n) < 0.2] = 0
+    sales = rng.integers(0, 8, n)
+    sales[rng.random(n) < 0.2] = 0
+    return pd.DataFrame({
+        'campaign_id': [f'CAMP-{i:04d}' for i in range(n)],
+        'sku': [f'SKU-{i:05d}' for i in range(n)],
+        'ad_spend': rng.uniform(0, 60, n).round(2),
+        'sales': sales,
+        'revenue': np.where(sales > 0, rng.uniform(0, 400, n).round(2), 0.0),
+        'clicks': clicks,
+        'impressions': clicks * rng.integers(1, 80, n),
+        'current_bid': rng.uniform(0.1, 3, n).round(2)
+    })
+
+
+def _engine(condition: str) -> RuleEngine:
+    engine = RuleEngine()
+    engine.rules = [Rule(
+        name='custom',
+        condition=condition,
+        action=BidAction.DECREASE,
+        adjustment_percent=-10,
+        explanation_template='ACOS {acos:.1f}%'
+    )]
+    return engine
+
+
+class DivisionByZeroTest(unittest.TestCase):
+    """Rows whose divisor is zero raise row by row and must not match in evaluate_frame either."""
+
+    CONDITIONS = (
+        'ad_spend / clicks > 3',
+        'revenue / sales > 20',
+        'ad_spend // clicks >= 5',
+        'ad_spend % clicks > 1',
+        'sales > 0 and ad_spend / clicks > 3',
+        # acos is inf without revenue; inf / 0 sets no floating-point flag
+        'acos / clicks > 50',
+        'acos // clicks > 50',
+        # Python raises OverflowError or computes exact integers where NumPy gives inf or wraps
+        'clicks ** acos > 1',
+        'impressions ** 20 > 10 ** 40'
+    )
+
+    def assert_matches_row_by_row(self, condition: str, data: pd.DataFrame):
+        engine = _engine(condition)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = [
+                rec.sku for rec in (engine.evaluate_row(row) for row in data.itertuples(index=False))
+                if rec.action != BidAction.NO_CHANGE
+            ]
+            actual = [rec.sku for rec in engine.evaluate_frame(data)]
+        self.assertEqual(actual, expected)
+
+    def test_zero_divisors_match_evaluate_row(self):
+        data = _report()
+        self.assertTrue(((data['clicks'] == 0) & (data['revenue'] == 0)).any())
+        for condition in self.CONDITIONS:
+            with self.subTest(condition=condition):
+                self.assert_matches_row_by_row(condition, data)
+
+    def test_infinite_dividend(self):
+        # Every zero divisor meets an inf ACOS, so no floating-point flag is set
+        data = _report(1).assign(sku='a', sales=0, revenue=0.0, clicks=0, impressions=0)
+        for condition in ('acos / clicks > 50', 'acos // clicks > 50', 'acos % clicks > 50'):
+            with self.subTest(condition=condition):
+                self.assert_matches_row_by_row(condition, data)
+
+    def test_no_zero_divisors_stays_vectorized(self):
+        data = _report()
+        data = data[(data['clicks'] > 0) & (data['sales'] > 0)]
+        for condition in self.CONDITIONS:
+            with self.subTest(condition=condition):
+                self.assert_matches_row_by_row(condition, data)
+
+
+@unittest.skipUnless(importlib.util.find_spec('polars'), 'polars is not installed')
+class PolarsEngineTest(unittest.TestCase):
+    """evaluate_frame_polars must agree with evaluate_frame and evaluate_row on any input the NumPy engine handles."""
+
+    CONDITIONS = DivisionByZeroTest.CONDITIONS + (
+        'clicks',
+        'revenue',
+        '0',
+        'not sales',
+        'unknown_metric > 1',
+        'acos * 0 > 1',
+        'acos - acos < 1',
+        'cpc // 0.1 > 30',
+        'ad_spend % 0.1 > 0.05'
+    )
+
+    def assert_same_recommendations(self, engine: RuleEngine, data: pd.DataFrame):
+        with contextlib.redirect_stdout(io.StringIO()):
+            row_by_row = [
+                rec for rec in (engine.evaluate_row(row) for row in data.itertuples(index=False))
+                if rec.action != BidAction.NO_CHANGE
+            ]
+            expected = engine.evaluate_frame(data)
+            actual = engine.evaluate_frame_polars(data)
+        summary = [(rec.sku, rec.action, rec.recommended_bid, rec.reason) for rec in expected]
+        self.assertEqual(summary, [(rec.sku, rec.action, rec.recommended_bid, rec.reason) for rec in row_by_row])
+        self.assertEqual([(rec.sku, rec.action, rec.recommended_bid, rec.reason) for rec in actual], summary)
+
+    def test_custom_conditions(self):
+        data = _report()
+        for condition in self.CONDITIONS:
+            with self.subTest(condition=condition):
+                self.assert_same_recommendations(_engine(condition), data)
+
+    def test_infinite_dividend(self):
+        data = _report(1).assign(sku='a', sales=0, revenue=0.0, clicks=0, impressions=0)
+        for condition in ('acos / clicks > 50', 'acos // clicks > 50'):
+            with self.subTest(condition=condition):
+                self.assert_same_recommendations(_engine(condition), data)
+
+    def test_default_rules(self):
+        self.assert_same_recommendations(RuleEngine(), _report(1000))
+
+    def test_mixed_type_id_column(self):
+        data = _report(20)
+        data['sku'] = pd.Series([12345, 'AB-9'] * 10, dtype=object)
+        self.assert_same_recommendations(RuleEngine(), data)
+
+if __name__ == '__main__':
+    unittest.main()